@@ -1,13 +1,72 @@
 
+import argparse
 import tkinter as tk
 from tkinter import ttk
 import random
+import sys
+from array import array
+from collections import namedtuple
+from itertools import compress
+from operator import attrgetter
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # run the batch kernel as plain Python
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+TAKEN_RATE = 0.4
+MAX_REGS = 64  # register bitmasks must fit a uint64
+REG_ID = {}  # register name -> small int id (also its bit in the masks), assigned on first use
+PREDICT_MODES = {"static_not_taken": 0, "static_taken": 1, "gshare": 3}  # anything else is random
+# 2-bit saturating counter transitions: COUNTER_NEXT[2 * counter + taken]
+COUNTER_NEXT = (0, 1, 0, 2, 1, 3, 2, 3)
+REFRESH_MS = 33  # the view polls the pipeline at ~30 Hz
+SNAPSHOT_SPAN = 32  # fetches covered by one fast-forward snapshot
+SNAPSHOT_TABLE_CHUNK = 1024  # instructions added to the fast-forward tables at a time
+SNAPSHOT_CACHE_MAX = 4096  # snapshots kept per pipeline; later ones are not cached
+SNAPSHOT_MISS_LIMIT = 64  # consecutive misses after which fast-forward gives up
+RUN_CHUNK = 1 << 16  # cycles per kernel call in BatchPipeline.run_until_done; bounds the rows buffer
+# layout of the batch kernel's state array
+HEAD, STALLS, FLUSHED, CURSOR, GHR, GUESS = 0, 1, 2, 3, 4, 5
+
+# rare per-cycle annotation: PRED:T/N, DATA_STALL, MISPREDICT, PRED_CORRECT
+Event = namedtuple("Event", "cycle instr kind")
+
+def reg_ids(regs):
+    """Map register names to an array('b') of ids; empty names are dropped."""
+    ids = array("b")
+    for r in regs:
+        if not r:
+            continue
+        if r not in REG_ID:
+            if len(REG_ID) >= MAX_REGS:
+                raise ValueError(f"more than {MAX_REGS} distinct registers")
+            REG_ID[r] = len(REG_ID)
+        ids.append(REG_ID[r])
+    return ids
+
+def reg_mask(ids):
+    mask = 0
+    for r in ids:
+        mask |= 1 << r
+    return mask
+
 #factory pattern
 class Instruction:
+    __slots__ = ("name", "reads", "writes", "is_branch", "predicted_taken", "actual_taken", "reads_mask", "writes_mask")
+
     def __init__(self, name, reads=None, writes=None, is_branch=False):
         self.name = name
-        self.reads = reads or []    
-        self.writes = writes or [] 
+        self.reads = reg_ids(reads or [])
+        self.writes = reg_ids(writes or [])
+        self.reads_mask = reg_mask(self.reads)
+        self.writes_mask = reg_mask(self.writes)
         self.is_branch = is_branch
         self.predicted_taken = None
         self.actual_taken = None
@@ -28,118 +87,373 @@ class InstructionFactory:
 class Pipeline:
     def __init__(self, stages, instructions, branch_predictor):
         self.stages = stages  # e.g. ["IF","ID","EX","MEM","WB"]
-        self.instr_queue = instructions[:] 
-        self.pipeline_regs = [None] * len(stages) 
+        self.instrs = tuple(instructions)
+        self.iq_head = 0
+        self.pipeline_regs = [-1] * len(stages)  # instruction index per stage, -1 = bubble
         self.cycle = 0
-        self.observers = []
         self.stalls = 0
         self.flushed = 0
         self.branch_predictor = branch_predictor
-
-        self.timeline = [] 
-
-    def attach(self, obs):
-        self.observers.append(obs)
-
-    def notify(self):
-        for o in self.observers:
-            o.update_view()
+        # branch outcomes are drawn up front and consumed in resolution order
+        self.outcome_stream = branch_predictor.outcome_stream(sum(1 for ins in self.instrs if ins.is_branch))
+        self.branch_cursor = 0
+
+        self.timeline = array("l")  # one row of instruction indices per cycle, -1 = bubble
+        self.events = []  # Event per prediction, stall and branch resolution
+        # straight-line segment signature -> (cycles, stalls, packed relative timeline rows, bubbles, relative events)
+        self.state_cache = {}
+        self.snapshot_misses = 0  # consecutive fast-forward attempts without a cache hit
+        # per-instruction (reads_mask, writes_mask) and index of the last branch at or before it,
+        # filled in SNAPSHOT_TABLE_CHUNK steps as fast-forward reaches further
+        self.signatures = []
+        self.last_branch = array("l")
 
     def detect_data_hazard(self, instr, earlier_instr):
         if earlier_instr is None: 
             return False
-        for r in instr.reads:
-            if r and r in earlier_instr.writes:
+        return bool(instr.reads_mask & earlier_instr.writes_mask)
+
+    def step(self):
+        self._advance()
+
+    def run(self, n):
+        """Advance up to n cycles, stopping once drained."""
+        self.run_until_done(self.cycle + n)
+
+    def run_until_done(self, max_cycles=None, fast_forward=False):
+        """Advance until drained (or until cycle max_cycles).
+
+        With fast_forward, branch-free stretches are replayed from state_cache
+        when the same pipeline state and upcoming code have been seen before.
+        Code that does not repeat, or branches too often, never hits, so after
+        SNAPSHOT_MISS_LIMIT attempts in a row without a hit the pipeline falls
+        back to plain stepping.
+        """
+        is_done, advance = self.is_done, self._advance
+        fast_forward = fast_forward and self.snapshot_misses < SNAPSHOT_MISS_LIMIT
+        while not is_done() and (max_cycles is None or self.cycle < max_cycles):
+            if fast_forward:
+                covered = self._fast_forward(max_cycles)
+                fast_forward = self.snapshot_misses < SNAPSHOT_MISS_LIMIT
+                if covered:
+                    continue
+            advance()
+
+    def _snapshot_tables(self, upto):
+        """Extend signatures and last_branch to cover at least instrs[:upto]."""
+        last_branch = self.last_branch
+        start = len(last_branch)
+        upto = min(len(self.instrs), max(upto, start + SNAPSHOT_TABLE_CHUNK))
+        chunk = self.instrs[start:upto]
+        self.signatures.extend(map(attrgetter("reads_mask", "writes_mask"), chunk))
+        last = last_branch[-1] if start else -1
+        pos = start
+        for i in compress(range(start, upto), map(attrgetter("is_branch"), chunk)):
+            last_branch.extend(array("l", [last]) * (i - pos))
+            last = pos = i
+        last_branch.extend(array("l", [last]) * (upto - pos))
+
+    def _fast_forward(self, max_cycles=None):
+        """Cover the next SNAPSHOT_SPAN fetches in one go; False if nothing was advanced."""
+        base = self.iq_head
+        end = base + SNAPSHOT_SPAN
+        row = self.pipeline_regs
+        front = row[:3]
+        # with no branch in IF/ID/EX or among the fetched instructions there is no prediction,
+        # resolution or flush, so the segment depends only on these offsets and register masks
+        lo = min([idx for idx in front if idx >= 0], default=base)
+        if end > len(self.instrs):
+            self.snapshot_misses += 1
+            return False
+        if end > len(self.last_branch):
+            self._snapshot_tables(end)
+        branch = self.last_branch[end - 1]
+        if branch >= lo:
+            self.snapshot_misses += 1
+            if branch < base:
+                return False
+            # every attempt fails until the branch is fetched, so step up to it in one go
+            while self.iq_head <= branch:
+                if max_cycles is not None and self.cycle >= max_cycles:
+                    return True
+                self._advance()
+            return True
+        signatures = self.signatures
+        key = (tuple([idx - base if idx >= 0 else None for idx in row]),
+               tuple([signatures[idx] if idx >= 0 else None for idx in front]),
+               tuple(signatures[base:end]))
+
+        timeline = self.timeline
+        hit = self.state_cache.get(key)
+        if hit is None:
+            self.snapshot_misses += 1
+            start_cycle, start_stalls = self.cycle, self.stalls
+            start_row, start_event = len(timeline), len(self.events)
+            while self.iq_head < end:
+                if max_cycles is not None and self.cycle >= max_cycles:
+                    return True  # cut short, so not worth caching
+                self._advance()
+            if len(self.state_cache) >= SNAPSHOT_CACHE_MAX:
                 return True
-        return False
-
-    def step(self): 
-        self.cycle += 1
-        cycle_events = {}  
-        stages_count = len(self.stages)
-        stall_needed = False
-        id_instr = self.pipeline_regs[1]
-        ex_instr = self.pipeline_regs[2]
-        if id_instr and ex_instr:
-            if self.detect_data_hazard(id_instr[1], ex_instr[1]):
-                stall_needed = True
-        if id_instr and id_instr[1].is_branch and id_instr[1].predicted_taken is None:
-            id_instr[1].predicted_taken = self.branch_predictor.predict(id_instr[1])
-            cycle_events[(id_instr[0], 1)] = f"PRED:{'T' if id_instr[1].predicted_taken else 'N'}"
+            recorded = timeline[start_row:]
+            # the rows become one integer with a timeline-item-sized field per cell, holding its offset from
+            # base (0 for bubbles); `ones` has a 1 in every field, so packed + base * ones shifts all cells at once
+            width = timeline.itemsize * len(recorded)
+            self.state_cache[key] = (
+                self.cycle - start_cycle,
+                self.stalls - start_stalls,
+                width,
+                int.from_bytes(array("l", [idx - base if idx >= 0 else 0 for idx in recorded]).tobytes(), sys.byteorder),
+                int.from_bytes((array("l", [1]) * len(recorded)).tobytes(), sys.byteorder),
+                tuple([p for p, idx in enumerate(recorded) if idx < 0]),
+                tuple([(e.cycle - start_cycle, e.instr - base, e.kind) for e in self.events[start_event:]]),
+            )
+            return True
 
+        cycles, stalls, width, packed, ones, bubbles, events = hit
+        if max_cycles is not None and self.cycle + cycles > max_cycles:
+            return False
+        self.snapshot_misses = 0
+        start_row = len(timeline)
+        timeline.frombytes((packed + base * ones).to_bytes(width, sys.byteorder))
+        for p in bubbles:
+            timeline[start_row + p] = -1
+        cycle = self.cycle
+        self.events.extend([Event(cycle + dc, off + base, kind) for dc, off, kind in events])
+        row[:] = timeline[-len(row):]
+        self.cycle = cycle + cycles
+        self.stalls += stalls
+        self.iq_head = end
+        return True
 
+    def _advance(self):
+        # hot path: attribute lookups are bound to locals once per cycle
+        cycle = self.cycle = self.cycle + 1
+        regs = self.pipeline_regs
+        instrs = self.instrs
+        predictor = self.branch_predictor
+        events_append = self.events.append
+        timeline_extend = self.timeline.extend
+        if_idx, id_idx, ex_idx = regs[0], regs[1], regs[2]
+        # detect_data_hazard inlined
+        stall_needed = id_idx >= 0 and ex_idx >= 0 and instrs[id_idx].reads_mask & instrs[ex_idx].writes_mask
+        if id_idx >= 0:
+            id_obj = instrs[id_idx]
+            if id_obj.is_branch and id_obj.predicted_taken is None:
+                id_obj.predicted_taken = predictor.predict(id_idx)
+                events_append(Event(cycle, id_idx, f"PRED:{'T' if id_obj.predicted_taken else 'N'}"))
+
+        # work out the new IF/ID/EX contents first (stall, fetch, flush), then write each slot once
         if stall_needed:
             self.stalls += 1
-            cycle_events[("stall", self.cycle)] = "DATA_STALL"
-            self.pipeline_regs[4] = self.pipeline_regs[3]
-            self.pipeline_regs[3] = self.pipeline_regs[2]
-            self.pipeline_regs[2] = None
-        else: 
-            self.pipeline_regs[4] = self.pipeline_regs[3]
-            self.pipeline_regs[3] = self.pipeline_regs[2]
-            self.pipeline_regs[2] = self.pipeline_regs[1]
-            self.pipeline_regs[1] = self.pipeline_regs[0]
-
-            if self.instr_queue:
-                instr = self.instr_queue.pop(0)
-                instr_index = len(self.timeline) 
-                self.pipeline_regs[0] = (instr_index, instr)
+            events_append(Event(cycle, id_idx, "DATA_STALL"))
+            # IF and ID hold, EX gets a bubble
+            new_if, new_id, new_ex = if_idx, id_idx, -1
+        else:
+            iq_head = self.iq_head
+            if iq_head < len(instrs):
+                new_if = iq_head
+                self.iq_head = iq_head + 1
             else:
-                self.pipeline_regs[0] = None
-        ex_entry = self.pipeline_regs[2]
-        if ex_entry and ex_entry[1].is_branch:
-            instr_obj = ex_entry[1]
-            instr_obj.actual_taken = self.branch_predictor.actual_outcome(instr_obj)
-            if instr_obj.predicted_taken != instr_obj.actual_taken: 
+                new_if = -1
+            new_id, new_ex = if_idx, id_idx
+        if new_ex >= 0 and instrs[new_ex].is_branch:
+            instr_obj = instrs[new_ex]
+            cursor = self.branch_cursor
+            taken = instr_obj.actual_taken = bool(self.outcome_stream[cursor])
+            self.branch_cursor = cursor + 1
+            predictor.update(new_ex, taken)
+            if instr_obj.predicted_taken != taken:
                 self.flushed += 1
-                cycle_events[("branch", ex_entry[0])] = "MISPREDICT"
-                if self.pipeline_regs[0]:
-                    self.pipeline_regs[0] = None
-                if self.pipeline_regs[1]:
-                    self.pipeline_regs[1] = None
-            else:
-                cycle_events[("branch", ex_entry[0])] = "PRED_CORRECT"
-
-        for s_idx in range(stages_count):
-            entry = self.pipeline_regs[s_idx]
-            if entry is None:
-                status = ""
+                events_append(Event(cycle, new_ex, "MISPREDICT"))
+                new_if = new_id = -1
             else:
-                idx, ins = entry
-                status = ins.name
-            cycle_events[(s_idx, )] = status
+                events_append(Event(cycle, new_ex, "PRED_CORRECT"))
 
-        self.timeline.append(cycle_events)
-        self.notify()
+        # one write of the whole row: the later stages shift down by one and the last one retires
+        regs[:] = [new_if, new_id, new_ex, *regs[2:-1]]
+        timeline_extend(regs)
 
     def is_done(self):
-        if any(self.pipeline_regs):
-            return False
-        if self.instr_queue:
-            return False
-        return True
+        # checked every cycle by run_until_done: the cheap fetch check first, then one C-level max
+        return self.iq_head >= len(self.instrs) and max(self.pipeline_regs) < 0
 
-class SimpleBranchPredictor:
+class BranchPredictor:
+    """predict(pc) is called in ID, update(pc, taken) once the branch resolves in EX; pc is the program index."""
+    def update(self, pc, taken):
+        pass
+
+    def outcome_stream(self, n):
+        """Draw n actual branch outcomes (1 = taken) in one call."""
+        return array("b", random.choices((1, 0), weights=(TAKEN_RATE, 1 - TAKEN_RATE), k=n))
+
+class SimpleBranchPredictor(BranchPredictor):
     def __init__(self, mode="static_not_taken"):
         self.mode = mode
+        # resolve the mode once; predict is then a plain call
+        self.predict = {
+            "static_taken": lambda pc: True,
+            "static_not_taken": lambda pc: False,
+        }.get(mode, lambda pc: random.random() < 0.5)  # default random
+
+class GsharePredictor(BranchPredictor):
+    """2-bit saturating counters indexed by pc XOR global branch history."""
+    mode = "gshare"
+
+    def __init__(self, bits=12):
+        self.table = array("B", [2]) * (1 << bits)  # start weakly taken
+        self.mask = (1 << bits) - 1
+        self.ghr = 0
+
+    def predict(self, pc):
+        return self.table[(pc ^ self.ghr) & self.mask] >= 2
+
+    def update(self, pc, taken):
+        i = (pc ^ self.ghr) & self.mask
+        self.table[i] = COUNTER_NEXT[2 * self.table[i] + taken]
+        self.ghr = ((self.ghr << 1) | taken) & self.mask
+
+
+def encode_program(instructions):
+    """Flatten instructions into parallel arrays: read/write register bitmasks and branch flags."""
+    reads = array("Q", [ins.reads_mask for ins in instructions])
+    writes = array("Q", [ins.writes_mask for ins in instructions])
+    is_branch = array("b", [1 if ins.is_branch else 0 for ins in instructions])
+    return reads, writes, is_branch
+
+
+@njit(cache=True)
+def run_cycles(regs, reads, writes, is_branch, pred, actual, outcomes, guesses, table, gmask, n_cycles, mode, state, timeline):
+    """Advance up to n_cycles (stopping once drained), writing one row of instruction indices per cycle."""
+    n_stages = len(regs)
+    n_instrs = len(is_branch)
+    ran = 0
+    while ran < n_cycles:
+        id_i = regs[1]
+        ex_i = regs[2]
+        stall = id_i >= 0 and ex_i >= 0 and (reads[id_i] & writes[ex_i]) != 0
+        if id_i >= 0 and is_branch[id_i] and pred[id_i] < 0:
+            if mode == 0:
+                pred[id_i] = 0
+            elif mode == 1:
+                pred[id_i] = 1
+            elif mode == 3:
+                pred[id_i] = 1 if table[(id_i ^ state[GHR]) & gmask] >= 2 else 0
+            else:
+                pred[id_i] = guesses[state[GUESS]]
+                state[GUESS] += 1
+
+        # new IF/ID/EX contents are settled first; one pass then shifts, writes and records the row
+        if stall:
+            state[STALLS] += 1
+            new_if = regs[0]
+            new_id = id_i
+            new_ex = -1
+        else:
+            if state[HEAD] < n_instrs:
+                new_if = state[HEAD]
+                state[HEAD] += 1
+            else:
+                new_if = -1
+            new_id = regs[0]
+            new_ex = id_i
+        if new_ex >= 0 and is_branch[new_ex]:
+            actual[new_ex] = outcomes[state[CURSOR]]
+            state[CURSOR] += 1
+            if mode == 3:
+                k = (new_ex ^ state[GHR]) & gmask
+                table[k] = COUNTER_NEXT[2 * table[k] + actual[new_ex]]
+                state[GHR] = ((state[GHR] << 1) | actual[new_ex]) & gmask
+            if pred[new_ex] != actual[new_ex]:
+                state[FLUSHED] += 1
+                new_if = -1
+                new_id = -1
+
+        row = ran * n_stages
+        busy = new_if >= 0 or new_id >= 0 or new_ex >= 0
+        for s in range(n_stages - 1, 2, -1):
+            v = regs[s - 1]
+            regs[s] = v
+            timeline[row + s] = v
+            if v >= 0:
+                busy = True
+        regs[0] = new_if
+        regs[1] = new_id
+        regs[2] = new_ex
+        timeline[row] = new_if
+        timeline[row + 1] = new_id
+        timeline[row + 2] = new_ex
+        ran += 1
+
+        if not busy and state[HEAD] >= n_instrs:
+            break
+    return ran
+
+
+class BatchPipeline(Pipeline):
+    """Pipeline whose cycle loop runs in the run_cycles kernel, `batch` cycles per step().
+
+    run_until_done() ignores `batch` and hands the kernel up to RUN_CHUNK
+    cycles per call, as it is only fast when compiled by numba.
+
+    The kernel records no events; only the timeline and counters are kept.
+    `program` may be passed instead of instructions as already-encoded
+    (reads, writes, is_branch) arrays, e.g. from gen_program(); instrs is
+    then empty and the view has no names to show.
+    """
+    def __init__(self, stages, instructions, branch_predictor, batch=64, program=None):
+        super().__init__(stages, instructions, branch_predictor)
+        self.batch = batch
+        if program is None:
+            program = encode_program(self.instrs)
+        else:
+            self.outcome_stream = branch_predictor.outcome_stream(sum(program[2]))
+        self.reads, self.writes, self.is_branch = program
+        self.pred = array("b", [-1]) * len(self.is_branch)
+        self.actual = array("b", [-1]) * len(self.is_branch)
+        self.regs = array("l", [-1]) * len(stages)
+        self.mode = PREDICT_MODES.get(branch_predictor.mode, 2)
+        # random predictions are drawn here, in the order the kernel consumes them, rather than
+        # inside the kernel, where numba's generator would ignore random.seed()
+        n_guesses = sum(self.is_branch) if self.mode == 2 else 0
+        self.guess_stream = array("b", [1 if branch_predictor.predict(0) else 0 for _ in range(n_guesses)])
+        # gshare state is shared with the predictor: the table in place, the history via GHR
+        self.table = getattr(branch_predictor, "table", array("B"))
+        self.gmask = getattr(branch_predictor, "mask", 0)
+        self.state = array("q", [0, 0, 0, 0, getattr(branch_predictor, "ghr", 0), 0])
+
+    def run_until_done(self, max_cycles=None, fast_forward=False):
+        if fast_forward:
+            raise ValueError("fast_forward needs Instruction objects and is not supported by BatchPipeline")
+        while not self.is_done() and (max_cycles is None or self.cycle < max_cycles):
+            self._advance(RUN_CHUNK if max_cycles is None else min(RUN_CHUNK, max_cycles - self.cycle))
+
+    def _advance(self, n_cycles=None):
+        n_cycles = n_cycles or self.batch
+        n_stages = len(self.stages)
+        rows = array("l", [-1]) * (n_cycles * n_stages)
+        ran = run_cycles(self.regs, self.reads, self.writes, self.is_branch, self.pred, self.actual,
+                         self.outcome_stream, self.guess_stream, self.table, self.gmask, n_cycles, self.mode,
+                         self.state, rows)
+        self.cycle += ran
+        self.iq_head = self.state[HEAD]
+        self.stalls = self.state[STALLS]
+        self.flushed = self.state[FLUSHED]
+        self.branch_cursor = self.state[CURSOR]
+        if self.mode == 3:
+            self.branch_predictor.ghr = self.state[GHR]
+        if ran < n_cycles:
+            del rows[ran * n_stages:]
+        self.timeline.extend(rows)
 
-    def predict(self, instr):
-        if self.mode == "static_taken":
-            return True
-        if self.mode == "static_not_taken":
-            return False
-        # default random
-        return random.choice([True, False])
-
-    def actual_outcome(self, instr):
-        return random.random() < 0.4   
+    def is_done(self):
+        return self.iq_head >= len(self.is_branch) and all(r < 0 for r in self.regs)
 
 
 class PipelineView:
-    def __init__(self, root, pipeline: Pipeline):
+    def __init__(self, root, pipeline: Pipeline, visible_rows=8):
         self.root = root
         self.pipeline = pipeline
-        pipeline.attach(self)
 
         self.root.title("Pipeline Simulation - Branch & Data Hazard Visualization")
         self.root.geometry("980x520")
@@ -153,25 +467,26 @@ class PipelineView:
         self.canvas = tk.Canvas(container, bg="#0f172a", width=940, height=360)
         self.canvas.pack(side="left", fill="both", expand=True)
 
-        self.scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.canvas.yview)
+        # the scrollbar pages timeline rows through the fixed cell pool rather than scrolling the canvas
+        self.scrollbar = ttk.Scrollbar(container, orient="vertical", command=self._on_scrollbar)
         self.scrollbar.pack(side="right", fill="y")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
-        self.inner_frame = tk.Frame(self.canvas, bg="#0f172a")
-        self.canvas.create_window((0, 0), window=self.inner_frame, anchor="nw")
 
         ctrl = tk.Frame(root, bg="#1f2937")
         ctrl.pack(fill="x")
         ttk.Button(ctrl, text="Step Cycle", command=self.step).pack(side="left", padx=6, pady=6)
         ttk.Button(ctrl, text="Run until done", command=self.run_all).pack(side="left", padx=6, pady=6)
+        ttk.Button(ctrl, text="Run fast", command=self.run_fast).pack(side="left", padx=6, pady=6)
 
         self.info = tk.Label(ctrl, text="Cycle: 0   Stalls: 0   Flushes: 0", fg="white", bg="#1f2937", font=("Arial", 11))
         self.info.pack(side="right", padx=10)
 
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind_all("<Button-4>", lambda e: self.scroll_rows(-1))
+        self.canvas.bind_all("<Button-5>", lambda e: self.scroll_rows(1))
 
         self.draw_headers()
-        self.boxes = []
+        self.build_cells(visible_rows)
+        self._poll()
 
     def draw_headers(self):
         self.canvas.delete("all")
@@ -182,30 +497,60 @@ class PipelineView:
             self.canvas.create_rectangle(x, y0, x + box_w, y0 + box_h, fill="#334155", outline="white")
             self.canvas.create_text(x + box_w/2, y0 + box_h/2, text=st, fill="white", font=("Arial", 11, "bold"))
 
-    def update_view(self):
-        self.draw_headers()
+    def build_cells(self, rows):
+        """Create a fixed pool of hidden row label, box and text items; update_view only reconfigures them."""
         x0, y0 = 120, 70
         box_w, box_h = 140, 46
-        cycles = len(self.pipeline.timeline)
-
-        for i, cycle_events in enumerate(self.pipeline.timeline):
-            self.canvas.create_text(40, y0 + i * box_h + box_h/2, text=f"C{ i+1 }", fill="white")
+        self.row_labels = []
+        self.cell_items = []  # cell_items[i][j] = (rect, text) for pool row i, stage j
+        for i in range(rows):
+            y = y0 + i * box_h
+            self.row_labels.append(self.canvas.create_text(40, y + box_h/2, text="", fill="white", state="hidden"))
+            row = []
             for j in range(len(self.stages)):
                 x = x0 + j * box_w
-                y = y0 + i * box_h
-                key = (j,)
-                status = cycle_events.get(key, "")
-                fill = "#0b1220"
-                text = status if status else ""
-                if text == "":
-                    fill = "#0b1220"
+                rect = self.canvas.create_rectangle(x, y, x + box_w, y + box_h, fill="#0b1220", outline="#334155", state="hidden")
+                text = self.canvas.create_text(x + box_w/2, y + box_h/2, text="", fill="white", font=("Arial", 10), state="hidden")
+                row.append((rect, text))
+            self.cell_items.append(row)
+        self.drawn_cycles = 0
+        self.drawn_first = 0  # cycle shown in the top pool row
+        self.top_row = None  # first cycle to show when scrolled back; None follows the newest cycles
+
+    def update_view(self, redraw=False):
+        n_stages = len(self.stages)
+        timeline = self.pipeline.timeline
+        instrs = self.pipeline.instrs
+        cycles = len(timeline) // n_stages
+        rows = len(self.cell_items)
+
+        # only new rows are touched unless the window moved (new cycles while following, or a scroll)
+        last_first = max(0, cycles - rows)
+        first = last_first if self.top_row is None else min(self.top_row, last_first)
+        start = first if redraw or first != self.drawn_first else max(self.drawn_cycles, first)
+        for c in range(start, min(cycles, first + rows)):
+            i = c - first
+            self.canvas.itemconfigure(self.row_labels[i], text=f"C{ c+1 }", state="normal")
+            for j, (rect, text) in enumerate(self.cell_items[i]):
+                idx = timeline[c * n_stages + j]
+                if idx < 0:
+                    self.canvas.itemconfigure(rect, fill="#0b1220", state="normal")
+                    self.canvas.itemconfigure(text, text="", state="normal")
                 else:
-                    fill = "#064e3b"
-                self.canvas.create_rectangle(x, y, x + box_w, y + box_h, fill=fill, outline="#334155")
-                self.canvas.create_text(x + box_w/2, y + box_h/2, text=text, fill="white", font=("Arial", 10))
+                    self.canvas.itemconfigure(rect, fill="#064e3b", state="normal")
+                    self.canvas.itemconfigure(text, text=instrs[idx].name, state="normal")
+        self.drawn_cycles = cycles
+        self.drawn_first = first
+        if cycles:
+            self.scrollbar.set(first / cycles, min(cycles, first + rows) / cycles)
 
         self.info.config(text=f"Cycle: {self.pipeline.cycle}   Stalls: {self.pipeline.stalls}   Flushes: {self.pipeline.flushed}")
-        self.root.update_idletasks()
+
+    def _poll(self):
+        """Redraw at display rate, and only when the pipeline has moved since the last draw."""
+        if self.pipeline.cycle != self.drawn_cycles:
+            self.update_view()
+        self.root.after(REFRESH_MS, self._poll)
 
     def step(self):
         if not self.pipeline.is_done():
@@ -220,9 +565,26 @@ class PipelineView:
                 self.root.after(600, runloop)
         runloop()
 
+    def run_fast(self, max_cycles=10**6):
+        """Run to completion without animating; the next poll draws the result."""
+        self.pipeline.run(max_cycles)
+
+    def scroll_rows(self, delta):
+        """Move the visible window by delta cycles; reaching the newest cycles resumes following them."""
+        last_first = max(0, self.drawn_cycles - len(self.cell_items))
+        first = min(max(0, self.drawn_first + delta), last_first)
+        self.top_row = None if first == last_first else first
+        self.update_view(redraw=True)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_rows(int(float(amount) * self.drawn_cycles) - self.drawn_first)
+        else:
+            self.scroll_rows(int(amount) * (len(self.cell_items) if unit == "pages" else 1))
+
     def _on_mousewheel(self, event):
         """Handles mouse scroll inside canvas"""
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.scroll_rows(int(-1 * (event.delta / 120)))
  
 def sample_program():
     f = InstructionFactory
@@ -235,12 +597,87 @@ def sample_program():
     ]
     return prog
 
+def random_program(n, branch_rate=0.15, n_regs=8):
+    """n random loads, ALU ops and branches over registers R1..R<n_regs>."""
+    f = InstructionFactory
+    regs = [f"R{r}" for r in range(1, n_regs + 1)]
+    prog = []
+    for i in range(n):
+        k = random.random()
+        if k < branch_rate:
+            prog.append(f.create_branch(f"I{i+1}: BR", reads=[random.choice(regs)]))
+        elif k < branch_rate + (1 - branch_rate) / 4:
+            prog.append(f.create_load(f"I{i+1}: LOAD", target_reg=random.choice(regs)))
+        else:
+            prog.append(f.create_alu(f"I{i+1}: ALU", reads=random.sample(regs, 2), writes=[random.choice(regs)]))
+    return prog
+
+
+def gen_program(n, branch_rate=0.15, n_regs=8):
+    """Same mix as random_program(), generated straight into encode_program()'s arrays."""
+    load_rate = (1 - branch_rate) / 4
+    # 0 = branch (one read), 1 = load (one write), 2 = ALU (two reads, one write)
+    kinds = random.choices((0, 1, 2), weights=(branch_rate, load_rate, 1 - branch_rate - load_rate), k=n)
+    ra = random.choices(range(n_regs), k=n)
+    # offset into the other n_regs - 1 registers, so ALU reads are distinct like random.sample()
+    rb = random.choices(range(n_regs - 1), k=n)
+    rw = random.choices(range(n_regs), k=n)
+    reads = array("Q", [0 if k == 1 else 1 << a if k == 0 else (1 << a) | (1 << (a + 1 + b) % n_regs)
+                        for k, a, b in zip(kinds, ra, rb)])
+    writes = array("Q", [0 if k == 0 else 1 << w for k, w in zip(kinds, rw)])
+    is_branch = array("b", [k == 0 for k in kinds])
+    return reads, writes, is_branch
+
+
+def make_predictor(name):
+    return GsharePredictor() if name == "gshare" else SimpleBranchPredictor(mode=name)
+
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline simulation with branch and data hazards")
+    parser.add_argument("--headless", action="store_true", help="simulate without the Tk view and print the counters")
+    parser.add_argument("--program", type=non_negative_int, default=None, metavar="N", help="use a random program of N instructions instead of the sample")
+    parser.add_argument("--cycles", type=non_negative_int, default=None, metavar="N", help="stop a headless run after N cycles")
+    parser.add_argument("--predictor", default="gshare", choices=["gshare", "static_taken", "static_not_taken", "random"])
+    parser.add_argument("--batch", action="store_true", help="use the batch kernel (BatchPipeline)")
+    parser.add_argument("--fast-forward", action="store_true", help="replay repeated branch-free stretches in a headless run")
+    args = parser.parse_args(argv)
+    if args.fast_forward and args.batch:
+        parser.error("--fast-forward applies to the Python pipeline, not --batch")
+    if args.cycles is not None and not args.headless:
+        parser.error("--cycles only applies to --headless runs")
+    if args.fast_forward and not args.headless:
+        parser.error("--fast-forward only applies to --headless runs")
+
+    if args.batch and not HAVE_NUMBA:
+        print("note: numba is not installed, so --batch runs its kernel as plain Python", file=sys.stderr)
 
-def main():
-    root = tk.Tk()
     stages = ["IF","ID","EX","MEM","WB"]
-    predictor = SimpleBranchPredictor(mode="static_not_taken")  
-    pipeline = Pipeline(stages, sample_program(), predictor)
+    predictor = make_predictor(args.predictor)
+    if args.headless and args.batch and args.program is not None:
+        # the kernel needs no Instruction objects, so generate the arrays directly
+        pipeline = BatchPipeline(stages, [], predictor, program=gen_program(args.program))
+    else:
+        program = sample_program() if args.program is None else random_program(args.program)
+        pipeline_cls = BatchPipeline if args.batch else Pipeline
+        pipeline = pipeline_cls(stages, program, predictor)
+
+    if args.headless:
+        if args.fast_forward:
+            pipeline.run_until_done(args.cycles, fast_forward=True)
+        else:
+            pipeline.run_until_done(args.cycles)
+        print(f"cycles={pipeline.cycle} stalls={pipeline.stalls} flushes={pipeline.flushed}")
+        return
+
+    root = tk.Tk()
     view = PipelineView(root, pipeline)
     root.mainloop()
 